@@ -320,14 +320,17 @@ class SimpleParser(Parser):
         @param number_requested the number of records requested to be returned
         @return an array of particles, with a length of the number requested or less
         """
-        particles_to_return = []
+        if number_requested <= 0:
+            return []
 
-        if number_requested > 0:
-            if self._file_parsed is False:
-                self.parse_file()
-                self._file_parsed = True
+        if self._file_parsed is False:
+            self.parse_file()
+            self._file_parsed = True
 
-        while len(particles_to_return) < number_requested and len(self._record_buffer) > 0:
-            particles_to_return.append(self._record_buffer.pop(0))
+        # Hand back the requested records as a single slice rather than popping
+        # the buffer one element at a time; each pop(0) shifts the whole
+        # remaining buffer, which is quadratic for large record counts.
+        particles_to_return = self._record_buffer[:number_requested]
+        self._record_buffer = self._record_buffer[number_requested:]
 
         return particles_to_return
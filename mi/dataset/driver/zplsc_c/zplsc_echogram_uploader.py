@@ -13,9 +13,13 @@ Initial Release
 
 import os
 import re
-import netCDF4
 from datetime import datetime, timedelta
 
+# netCDF4 and h5py are imported lazily (see _lazy_netcdf4/_lazy_h5py below)
+# rather than at module scope: both pull in the HDF5 shared libraries and a
+# large slice of numpy, which would otherwise be paid at start-up by every
+# driver that transitively imports this module without ever opening a file.
+
 from mi.core.versioning import version
 from mi.core.instrument.dataset_data_particle import DataParticle, DataParticleKey, DataParticleValue
 from mi.core.common import BaseEnum
@@ -32,8 +36,102 @@ from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 
 log = get_logger()
 
+# The same conversion_time string recurs across the many echograms derived from
+# one hourly file, so memoize the ISO8601-to-NTP conversion for this module.
+_ntp_date_time_cache = {}
+
+
+def _cached_string_to_ntp_date_time(time_str):
+    try:
+        return _ntp_date_time_cache[time_str]
+    except KeyError:
+        ntp_time = string_to_ntp_date_time(time_str)
+        _ntp_date_time_cache[time_str] = ntp_time
+        return ntp_time
+
+
 HOURLY_FILENAME_DATE_FORMAT = '%y%m%d%H.nc'
 
+# The name of the echogram file can be of the "Averaged", "Full" or simple "Hourly" formats.
+# Compile the filename patterns once at import so parse_file does not re-compile
+# them on every invocation (or once per directory entry in the hourly file scan).
+AVERAGED_OR_FULL_FILENAME_REGEX = \
+    r'Bioacoustic_Echogram_(?P<start_date>[0-9]{8})-(?P<stop_date>[0-9]{8})_Calibrated_Sv_(?P<type>Averaged|Full)_?(?P<date>[0-9]{8})?\.nc'
+AVERAGED_OR_FULL_FILENAME_MATCHER = re.compile(AVERAGED_OR_FULL_FILENAME_REGEX)
+
+HOURLY_FILENAME_REGEX = r'^[0-9]{8}\.nc'
+HOURLY_FILENAME_MATCHER = re.compile(HOURLY_FILENAME_REGEX)
+
+
+_netcdf4_module = None
+_h5py_module = None
+_h5py_import_attempted = False
+
+
+def _lazy_netcdf4():
+    """
+    Import netCDF4 on first use; sys.modules makes the repeat calls free.
+    """
+    global _netcdf4_module
+    if _netcdf4_module is None:
+        import netCDF4
+        _netcdf4_module = netCDF4
+    return _netcdf4_module
+
+
+def _disable_var_chunk_cache(variable):
+    """
+    Turn off the per-variable chunk cache before a one-shot read. This driver
+    never re-reads within a file, so the default 4 MB cache allocated for the
+    variable is pure waste. Scoped to the variable so the process-global
+    netCDF default (shared with any other drivers in the ingest process) is
+    left alone. Only valid for variables in nc4 files (the hourly files);
+    set_var_chunk_cache raises RuntimeError on classic-format files like the
+    Averaged/Full echograms.
+    """
+    variable.set_var_chunk_cache(size=0, nelems=0, preemption=0.0)
+    return variable
+
+
+def _lazy_h5py():
+    """
+    Import h5py on first use, or return None if it is not installed. The
+    provenance reads only touch a handful of attributes under the "Provenance"
+    group; h5py opens an HDF5-backed NetCDF-4 file without the full netCDF
+    library initialization (dimension/variable/group enumeration), which
+    dominates the cost of such small reads, so it is preferred with netCDF4
+    as the fallback.
+    """
+    global _h5py_module, _h5py_import_attempted
+    if not _h5py_import_attempted:
+        _h5py_import_attempted = True
+        try:
+            import h5py
+            _h5py_module = h5py
+        except ImportError:
+            _h5py_module = None
+    return _h5py_module
+
+
+def _parse_hourly_filename(name):
+    """
+    Parse an hourly filename of the fixed yymmddHH.nc layout into a datetime
+    by direct integer slicing. Equivalent to datetime.strptime with
+    HOURLY_FILENAME_DATE_FORMAT (including the %y century pivot) but without
+    the format-string parsing and locale machinery strptime runs per call.
+    """
+    two_digit_year = int(name[0:2])
+    year = 2000 + two_digit_year if two_digit_year < 69 else 1900 + two_digit_year
+    return datetime(year, int(name[2:4]), int(name[4:6]), int(name[6:8]))
+
+
+def _decode_if_bytes(value):
+    """
+    h5py returns string datasets and attributes as bytes; decode them to
+    preserve the string semantics the netCDF4 reads provided downstream.
+    """
+    return value.decode() if isinstance(value, bytes) else value
+
 
 @version("0.2.0")
 def parse(unused, echogram_file_path, particle_data_handler):
@@ -144,17 +242,20 @@ class ZplscEchogramUploadDriver(SimpleDatasetDriver):
         # Translate the echogram generator-specific provenance keys extracted by the parser into
         # generic processing information that is understood by the caller and the rest of the system.
 
-        if ZplscProvenanceKey.DATA_FILE_NAME in self._parser.provenance.keys():
-            self._particle_data_handler.setProcessingInfo(ProcessingInfoKey.DATA_FILE,
-                        self._parser.provenance[ZplscProvenanceKey.DATA_FILE_NAME])
+        provenance = self._parser.provenance
+        set_processing_info = self._particle_data_handler.setProcessingInfo
 
-        if ZplscProvenanceKey.CONVERSION_SOFTWARE_NAME in self._parser.provenance.keys():
-            self._particle_data_handler.setProcessingInfo(ProcessingInfoKey.PARSER,
-                        self._parser.provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_NAME])
+        if ZplscProvenanceKey.DATA_FILE_NAME in provenance:
+            set_processing_info(ProcessingInfoKey.DATA_FILE,
+                                provenance[ZplscProvenanceKey.DATA_FILE_NAME])
 
-        if ZplscProvenanceKey.CONVERSION_SOFTWARE_VERSION in self._parser.provenance.keys():
-            self._particle_data_handler.setProcessingInfo(ProcessingInfoKey.PARSER_VERSION,
-                        self._parser.provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_VERSION])
+        if ZplscProvenanceKey.CONVERSION_SOFTWARE_NAME in provenance:
+            set_processing_info(ProcessingInfoKey.PARSER,
+                                provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_NAME])
+
+        if ZplscProvenanceKey.CONVERSION_SOFTWARE_VERSION in provenance:
+            set_processing_info(ProcessingInfoKey.PARSER_VERSION,
+                                provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_VERSION])
 
 
 class ZplscEchogramUploadParser(SimpleParser):
@@ -170,11 +271,32 @@ class ZplscEchogramUploadParser(SimpleParser):
         # will be extracted from an co-located "hourly" .nc file.
         self.provenance = {}
 
+        # NTP timestamp parsed from the provenance conversion_time, cached by
+        # set_provenance_from_hourly_files for reuse as the driver timestamp
+        self._conversion_time_ntp = None
+
         self._echogram_filepath = echogram_filepath
 
     """
     Parser for zplsc_metadata.
     """
+    def get_records(self, number_requested=1):
+        """
+        This parser produces at most one particle per file, so shortcut the
+        SimpleParser buffer-draining loop: parse the file once and hand the
+        record buffer back whole instead of popping it one record at a time.
+        """
+        if number_requested <= 0:
+            return []
+
+        if self._file_parsed is False:
+            self.parse_file()
+            self._file_parsed = True
+
+        particles_to_return = self._record_buffer
+        self._record_buffer = []
+        return particles_to_return
+
     def parse_file(self):
 
         echogram_dirname, echogram_filename = os.path.split(self._echogram_filepath)
@@ -191,66 +313,99 @@ class ZplscEchogramUploadParser(SimpleParser):
         #     GI02HYPM_UPPER_Bioacoustic_Echogram_20200823-20200830_Calibrated_Sv_Full_20200823.nc
         # or (hourly)
         #     20082923.nc
-        averaged_or_full_filename_regex_str = \
-            r'Bioacoustic_Echogram_(?P<start_date>[0-9]{8})-(?P<stop_date>[0-9]{8})_Calibrated_Sv_(?P<type>Averaged|Full)_?(?P<date>[0-9]{8})?\.nc'
-
-        hourly_filename_regex_str = r'^[0-9]{8}\.nc'
-
-        m = re.compile(averaged_or_full_filename_regex_str).search(echogram_filename)
+        # A cheap substring precheck skips the unanchored regex search entirely
+        # for hourly filenames, the most common case.
+        if 'Bioacoustic_Echogram_' in echogram_filename:
+            m = AVERAGED_OR_FULL_FILENAME_MATCHER.search(echogram_filename)
+        else:
+            m = None
         if m:
             echogram_type = m.group('type')
         else:
-            m = re.compile(hourly_filename_regex_str).match(echogram_filename)
+            m = HOURLY_FILENAME_MATCHER.match(echogram_filename)
             if m:
                 echogram_type = ZplscEchogramType.HOURLY
             else:
                 error_msg = "Filename \"%s\" not in either of the expected formats: \"%s\" or \"%s\"" % \
-                        (echogram_filename, averaged_or_full_filename_regex_str, hourly_filename_regex_str)
+                        (echogram_filename, AVERAGED_OR_FULL_FILENAME_REGEX, HOURLY_FILENAME_REGEX)
                 log.error(error_msg)
                 raise SampleException(error_msg)
 
         # Use the regex match captures from the echogram_filename to generate another regex as well as
         # start date and end date criteria to find the hourly .nc files that correspond to the echogram.
+        # The start/stop hour strings are in the same yymmddHH layout as the hourly
+        # filenames, so candidate files can be range-checked by string comparison
+        # (zero-padded digits sort chronologically) without a strptime per file.
         if echogram_type == ZplscEchogramType.FULL:
             # RegEx to find the hourly files for 1 day
             hourly_file_regex = r'^' + m.group('date')[2:] + r'[0-9]{2}\.nc'
             start_day_datetime = datetime.strptime(m.group('date'), "%Y%m%d")
             # Assume the stop time to be the beginning of the next day
             stop_day_datetime = start_day_datetime + timedelta(days=1)
+            start_hour_str = m.group('date')[2:] + '00'
+            # Format the stop day from its components; strftime would re-parse
+            # the format string and do a locale lookup for the same digits.
+            stop_hour_str = '%02d%02d%02d00' % \
+                (stop_day_datetime.year % 100, stop_day_datetime.month, stop_day_datetime.day)
         elif echogram_type == ZplscEchogramType.AVERAGED:
             # RegEx to find all of the hourly files for the month (all hourly files in the dir)
             hourly_file_regex = r'^[0-9]{8}\.nc'
             start_day_datetime = datetime.strptime(m.group('start_date'), "%Y%m%d")
             # The stop time in the filename is already the beginning of the next day
             stop_day_datetime = datetime.strptime(m.group('stop_date'), "%Y%m%d")
+            start_hour_str = m.group('start_date')[2:] + '00'
+            stop_hour_str = m.group('stop_date')[2:] + '00'
         else: # ZplscEchogramType.HOURLY
             hourly_file_regex = echogram_filename
-            start_day_datetime = datetime.strptime(echogram_filename, HOURLY_FILENAME_DATE_FORMAT)
+            start_day_datetime = _parse_hourly_filename(echogram_filename)
             stop_day_datetime = start_day_datetime
-
-        # Get a list of the hourly files that correspond to the echogram time range.
-        # These hourly files contain the provenance for the echogram.
-        hourly_files = [f for f in os.listdir(echogram_dirname)
-                        if re.match(hourly_file_regex, f)
-                            and (echogram_type == ZplscEchogramType.HOURLY
-                                 or
-                                 (start_day_datetime <= datetime.strptime(f, HOURLY_FILENAME_DATE_FORMAT) < stop_day_datetime))]
-
-        if len(hourly_files) == 0:
+            start_hour_str = stop_hour_str = None  # no range check for an exact filename match
+
+        # Find the first and last hourly files that correspond to the echogram time range.
+        # These hourly files contain the provenance for the echogram. Only the first and
+        # last files in the range are needed, so track the min and max filenames in a
+        # single pass over the directory rather than building and sorting the full list.
+        # Compile the hourly file pattern once rather than once per directory entry.
+        hourly_file_matcher = re.compile(hourly_file_regex)
+        first_hourly_file = None
+        last_hourly_file = None
+        for f in os.listdir(echogram_dirname):
+            if not hourly_file_matcher.match(f):
+                continue
+            if echogram_type != ZplscEchogramType.HOURLY \
+                    and not (start_hour_str <= f[:8] < stop_hour_str):
+                continue
+            if first_hourly_file is None or f < first_hourly_file:
+                first_hourly_file = f
+            if last_hourly_file is None or f > last_hourly_file:
+                last_hourly_file = f
+
+        if first_hourly_file is None:
             error_msg = "Hourly files from %s to %s corresponding to \"%s\" echogram \"%s\" could not be found that match regex \"%s\"" %\
                  (start_day_datetime.strftime(HOURLY_FILENAME_DATE_FORMAT), stop_day_datetime.strftime(HOURLY_FILENAME_DATE_FORMAT),
                   echogram_type, echogram_filename, hourly_file_regex)
             log.error(error_msg)
             raise SampleException(error_msg)
 
-        hourly_files.sort()
         particle_data_dict = {}
 
-        # Use the first and last hourly files in the sorted list to get the provenance information.
+        # Use the first and last hourly files in the range to get the provenance information.
         # Get the provenance before we generate the particle since we use the
-        # Provenance.conversion_time to set the DataParticle.driver_timestamp
-        self.set_provenance_from_hourly_files(os.path.join(echogram_dirname, hourly_files[0]),
-                                              os.path.join(echogram_dirname, hourly_files[-1]))
+        # Provenance.conversion_time to set the DataParticle.driver_timestamp.
+        # For an HOURLY echogram the echogram file IS the single hourly file, so one
+        # open serves both the provenance and the first ping_time read; otherwise the
+        # ping_time has to come from a separate open of the echogram itself.
+        # The echogram path handed down from uFrame is a full path, so
+        # echogram_dirname is non-empty and already normalized; plain
+        # concatenation avoids os.path.join's separator handling.
+        first_hourly_path = echogram_dirname + os.sep + first_hourly_file
+        last_hourly_path = echogram_dirname + os.sep + last_hourly_file
+        if echogram_type == ZplscEchogramType.HOURLY:
+            first_ping_time = self.set_provenance_from_hourly_files(first_hourly_path, last_hourly_path,
+                                                                    read_ping_time=True)
+        else:
+            self.set_provenance_from_hourly_files(first_hourly_path, last_hourly_path)
+            first_ping_time = self.get_first_ping_time_from_echogram()
 
         # The HOURLY file and the FULL file will have the same first ping_time which we use as the
         # 'time' value in the cassandra record. Stream engine would filter out one of the records thinking
@@ -259,7 +414,6 @@ class ZplscEchogramUploadParser(SimpleParser):
 
         # Add the internal_timestamp, zplsc_timestamp and the echogram path to the data dictionary
         # that will later be used to generate the zplsc_metadata particle
-        first_ping_time = self.get_first_ping_time_from_echogram(echogram_type)
         particle_data_dict[DataParticleKey.INTERNAL_TIMESTAMP] = first_ping_time + timestamp_offset
         particle_data_dict[ZplscMetadataParticleKey.FILE_TIME] = first_ping_time
         particle_data_dict[ZplscMetadataParticleKey.ECHOGRAM_PATH] = self._echogram_filepath
@@ -268,33 +422,83 @@ class ZplscEchogramUploadParser(SimpleParser):
         particle = self._extract_sample(ZplscMetadataParticle, None, particle_data_dict, None,
                                         particle_data_dict[DataParticleKey.INTERNAL_TIMESTAMP])
 
-        # This field needs to be set after particle creation to overwrite the value set by the constructor
-        particle.contents[DataParticleKey.DRIVER_TIMESTAMP] =\
-            string_to_ntp_date_time(self.provenance[ZplscProvenanceKey.CONVERSION_TIME])
+        # This field needs to be set after particle creation to overwrite the value set by
+        # the constructor. The NTP value was already parsed when the provenance was read.
+        particle.contents[DataParticleKey.DRIVER_TIMESTAMP] = self._conversion_time_ntp
 
         if particle is not None and not particle.get_encoding_errors():
             self._record_buffer.append(particle)
 
-    def set_provenance_from_hourly_files(self, first_hourly_file, last_hourly_file):
+    def set_provenance_from_hourly_files(self, first_hourly_file, last_hourly_file, read_ping_time=False):
+        """
+        Read the provenance from the first and last hourly files in the range.
+        When read_ping_time is True (the HOURLY echogram case, where the echogram
+        is itself the first hourly file) the first ping_time is read from the same
+        open, avoiding a second open of the same file, and returned. The raw
+        ping_time value is already in NTP seconds.
+        """
+        first_ping_time = None
+
+        h5py = _lazy_h5py()
+        if h5py is not None:
+            with h5py.File(first_hourly_file, 'r') as hdf_file:
+                provenance_group = hdf_file['Provenance']
+                self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] = \
+                    _decode_if_bytes(provenance_group['source_filenames'][0])
+                self.provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_NAME] = \
+                    _decode_if_bytes(provenance_group.attrs['conversion_software_name'])
+                self.provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_VERSION] = \
+                    _decode_if_bytes(provenance_group.attrs['conversion_software_version'])
+                self.provenance[ZplscProvenanceKey.CONVERSION_TIME] = \
+                    _decode_if_bytes(provenance_group.attrs['conversion_time'])
+                self._conversion_time_ntp = \
+                    _cached_string_to_ntp_date_time(self.provenance[ZplscProvenanceKey.CONVERSION_TIME])
+                if read_ping_time:
+                    first_ping_time = hdf_file['Vendor_specific']['ping_time'][0]
+
+            if not first_hourly_file == last_hourly_file:
+                with h5py.File(last_hourly_file, 'r') as hdf_file:
+                    self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] = self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] \
+                        + ' ... ' + _decode_if_bytes(hdf_file['Provenance']['source_filenames'][0])
+            return first_ping_time
+
+        netCDF4 = _lazy_netcdf4()
         nc4_dataset = netCDF4.Dataset(first_hourly_file)
-        self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] = nc4_dataset.groups['Provenance'].variables['source_filenames'][0]
+        self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] = \
+            _disable_var_chunk_cache(nc4_dataset.groups['Provenance'].variables['source_filenames'])[0]
         self.provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_NAME] = nc4_dataset.groups['Provenance'].conversion_software_name
         self.provenance[ZplscProvenanceKey.CONVERSION_SOFTWARE_VERSION] = nc4_dataset.groups['Provenance'].conversion_software_version
         self.provenance[ZplscProvenanceKey.CONVERSION_TIME] = nc4_dataset.groups['Provenance'].conversion_time
+        self._conversion_time_ntp = \
+            _cached_string_to_ntp_date_time(self.provenance[ZplscProvenanceKey.CONVERSION_TIME])
+        if read_ping_time:
+            # Disable masked-array and scale/offset conversion; ping_time is a
+            # raw unscaled value and a plain scalar read is all that is needed.
+            nc4_dataset.set_auto_maskandscale(False)
+            first_ping_time = \
+                _disable_var_chunk_cache(nc4_dataset.groups['Vendor_specific'].variables['ping_time'])[0]
         nc4_dataset.close()
 
         if not first_hourly_file == last_hourly_file:
             nc4_dataset = netCDF4.Dataset(last_hourly_file)
             self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] = self.provenance[ZplscProvenanceKey.DATA_FILE_NAME] \
-                + ' ... ' + nc4_dataset.groups['Provenance'].variables['source_filenames'][0]
+                + ' ... ' + _disable_var_chunk_cache(nc4_dataset.groups['Provenance'].variables['source_filenames'])[0]
             nc4_dataset.close()
 
-    def get_first_ping_time_from_echogram(self, echogram_type):
+        return first_ping_time
+
+    def get_first_ping_time_from_echogram(self):
+        """
+        Read the first ping_time from an AVERAGED or FULL echogram. The first
+        ping_time of an HOURLY echogram is read along with the provenance in
+        set_provenance_from_hourly_files so the file is only opened once.
+        """
+        # AVERAGED and FULL echograms are not of nc4 format (not HDF5-backed,
+        # so not readable by h5py) and don't have groups
+        netCDF4 = _lazy_netcdf4()
         nc4_dataset = netCDF4.Dataset(self._echogram_filepath)
-        if echogram_type == ZplscEchogramType.HOURLY:
-            first_ping_time = nc4_dataset.groups['Vendor_specific'].variables['ping_time'][0]
-        else: # AVERAGED and FULL echograms are not of nc4 format and don't have groups
-            first_ping_time = time_to_ntp_date_time(nc4_dataset.variables['ping_time'][0])
+        nc4_dataset.set_auto_maskandscale(False)
+        first_ping_time = time_to_ntp_date_time(nc4_dataset.variables['ping_time'][0])
         nc4_dataset.close()
         return first_ping_time
 
@@ -11,6 +11,7 @@ full negative testing is not done.  See dosta_ln_auv and adcpa_n_auv
 for complete testing of AuvCommonParser
 """
 
+import io
 import os
 
 from nose.plugins.attrib import attr
@@ -36,7 +37,11 @@ class CtdavNAuvTestCase(ParserUnitTestCase):
         Expect the first two input records to be skipped due to invalid timestamp.
         """
 
-        stream_handle = open(os.path.join(RESOURCE_PATH, 'subset_reduced.csv'), 'rU')
+        # Read as bytes with a 1 MiB buffer; the file header contains non-ASCII
+        # characters (degree signs) that text-mode decoding would trip over, and
+        # the parser strips line terminators itself.
+        stream_handle = io.open(os.path.join(RESOURCE_PATH, 'subset_reduced.csv'), 'rb',
+                                buffering=1 << 20)
 
         parser = CtdavNAuvParser(stream_handle,
                                  self.exception_callback)
@@ -55,7 +60,8 @@ class CtdavNAuvTestCase(ParserUnitTestCase):
         Assert the expected number of particles is captured and there are no exceptions
         """
 
-        stream_handle = open(os.path.join(RESOURCE_PATH, 'subset.csv'), 'rU')
+        stream_handle = io.open(os.path.join(RESOURCE_PATH, 'subset.csv'), 'rb',
+                                buffering=1 << 20)
 
         parser = CtdavNAuvParser(stream_handle,
                                  self.exception_callback)